@@ -5,7 +5,7 @@ CLI interface for Whatnot Slot Matcher.
 import argparse
 import sys
 from pathlib import Path
-from app.matcher import load_csv, match, export_csv
+from app.matcher import load_csv, match, EXPORTERS
 
 
 def main():
@@ -23,6 +23,9 @@ Examples:
 
   # Use sequence mode starting at slot 5
   whatnot-matcher --in orders.csv --out matched.csv --mode sequence --start-slot 5
+
+  # Write Parquet instead of CSV
+  whatnot-matcher --in orders.csv --out matched.parquet --format parquet
         """
     )
 
@@ -37,7 +40,15 @@ Examples:
         '--out',
         dest='output_file',
         required=True,
-        help='Output CSV file path'
+        help='Output file path'
+    )
+
+    parser.add_argument(
+        '--format',
+        dest='output_format',
+        choices=list(EXPORTERS),
+        default='csv',
+        help='Output file format (default: csv)'
     )
 
     parser.add_argument(
@@ -80,9 +91,7 @@ Examples:
         # Load CSV
         print(f"Loading CSV from {args.input_file}...")
         with open(input_path, 'rb') as f:
-            file_bytes = f.read()
-
-        df = load_csv(file_bytes)
+            df = load_csv(f)
         print(f"Loaded {len(df)} rows")
 
         # Parse keywords
@@ -110,7 +119,7 @@ Examples:
 
         # Export
         print(f"\nWriting output to {args.output_file}...")
-        output_bytes = export_csv(matched_df)
+        output_bytes = EXPORTERS[args.output_format](matched_df)
         with open(args.output_file, 'wb') as f:
             f.write(output_bytes)
 
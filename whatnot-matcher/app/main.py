@@ -3,14 +3,19 @@ FastAPI web server for Whatnot Slot Matcher.
 """
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.requests import Request
-from typing import Optional
-import io
+from collections import OrderedDict
+from typing import BinaryIO, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import threading
 
-from app.matcher import load_csv, match, export_csv
+import pandas as pd
+
+from app.matcher import load_csv, detect_mode, match, iter_csv, EXPORTERS
 
 app = FastAPI(title="Whatnot Slot Matcher", version="1.0.0")
 
@@ -20,6 +25,131 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 # Setup templates
 templates = Jinja2Templates(directory="app/templates")
 
+# Number of matched rows returned by /match for the UI preview
+PREVIEW_ROWS = 25
+
+# Media type and file extension for each download format
+DOWNLOAD_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "feather": ("application/vnd.apache.arrow.file", "feather"),
+}
+
+# Number of parsed uploads kept in memory, so re-submitting the same file
+# with different keywords or start slot skips CSV parsing and mode detection
+UPLOAD_CACHE_SIZE = 8
+
+_upload_cache: "OrderedDict[bytes, Tuple[pd.DataFrame, str]]" = OrderedDict()
+_upload_cache_lock = threading.Lock()
+
+
+def _upload_key(upload: BinaryIO) -> bytes:
+    """
+    Hash an upload's contents, reading it in chunks and rewinding afterwards.
+
+    Args:
+        upload: Binary file object with the CSV upload
+
+    Returns:
+        16-byte BLAKE2b digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: upload.read(1 << 20), b""):
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.digest()
+
+
+def _load_upload(upload: BinaryIO) -> Tuple[pd.DataFrame, str]:
+    """
+    Load an uploaded CSV and detect its mode, reusing earlier results.
+
+    Cached frames are safe to share because match() never modifies its input.
+
+    Args:
+        upload: Binary file object with the CSV upload
+
+    Returns:
+        Tuple of (df, detected_mode)
+    """
+    key = _upload_key(upload)
+    with _upload_cache_lock:
+        cached = _upload_cache.get(key)
+        if cached is not None:
+            _upload_cache.move_to_end(key)
+            return cached
+
+    df = load_csv(upload)
+    loaded = (df, detect_mode(df))
+
+    with _upload_cache_lock:
+        _upload_cache[key] = loaded
+        while len(_upload_cache) > UPLOAD_CACHE_SIZE:
+            _upload_cache.popitem(last=False)
+
+    return loaded
+
+
+def _load_and_match(
+    upload: BinaryIO,
+    mode: str,
+    start_slot: int,
+    exclude_keywords: str,
+    include_keywords: str
+) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Load an uploaded CSV and match it to inventory slots.
+
+    This is blocking, CPU-bound work, so endpoints run it via asyncio.to_thread.
+
+    Args:
+        upload: Binary file object with the CSV upload
+        mode: Matching mode (auto, sku, or sequence)
+        start_slot: Starting slot number
+        exclude_keywords: Comma-separated keywords to exclude
+        include_keywords: Comma-separated keywords to include
+
+    Returns:
+        Tuple of (matched_df, summary_dict) from match()
+    """
+    df, detected_mode = _load_upload(upload)
+    if mode == "auto":
+        mode = detected_mode
+
+    # Parse keywords
+    exclude_list = [k.strip() for k in exclude_keywords.split(',') if k.strip()]
+    include_list = [k.strip() for k in include_keywords.split(',') if k.strip()]
+
+    return match(
+        df,
+        mode=mode,
+        start_slot=start_slot,
+        exclude_keywords=exclude_list,
+        include_keywords=include_list
+    )
+
+
+def _preview_records(df: pd.DataFrame) -> List[Dict]:
+    """
+    Convert the first PREVIEW_ROWS rows to JSON-friendly records.
+
+    The frame is sliced before anything is converted, one column at a time, so
+    only preview cells are turned into Python objects. Missing values become
+    None, since NaN and NA are not valid JSON.
+
+    Args:
+        df: Matched DataFrame
+
+    Returns:
+        List of row dicts keyed by column name
+    """
+    head = df.head(PREVIEW_ROWS)
+    columns = [
+        [None if pd.isna(value) else value for value in head[column].tolist()]
+        for column in head.columns
+    ]
+    return [dict(zip(head.columns, row)) for row in zip(*columns)]
+
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -57,38 +187,28 @@ async def match_endpoint(
         if start_slot < 1:
             raise HTTPException(status_code=400, detail="start_slot must be >= 1")
 
-        # Read file
-        file_bytes = await file.read()
-
-        # Load CSV
-        df = load_csv(file_bytes)
-
-        # Parse keywords
-        exclude_list = [k.strip() for k in exclude_keywords.split(',') if k.strip()]
-        include_list = [k.strip() for k in include_keywords.split(',') if k.strip()]
-
-        # Match
-        matched_df, summary = match(
-            df,
-            mode=mode,
-            start_slot=start_slot,
-            exclude_keywords=exclude_list,
-            include_keywords=include_list
+        # Load and match in a worker thread to keep the event loop free
+        await file.seek(0)
+        matched_df, summary = await asyncio.to_thread(
+            _load_and_match,
+            file.file,
+            mode,
+            start_slot,
+            exclude_keywords,
+            include_keywords
         )
 
-        # Convert to JSON-friendly format
-        # Limit preview to first 25 rows
-        preview_df = matched_df.head(25)
-
         response = {
             "summary": summary,
-            "preview": preview_df.to_dict(orient="records"),
+            "preview": _preview_records(matched_df),
             "columns": list(matched_df.columns),
             "total_rows": len(matched_df)
         }
 
         return response
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -101,53 +221,61 @@ async def download_endpoint(
     mode: str = Form("auto"),
     start_slot: int = Form(1),
     exclude_keywords: str = Form(""),
-    include_keywords: str = Form("")
+    include_keywords: str = Form(""),
+    output_format: str = Form("csv", alias="format")
 ):
     """
-    Match and download CSV.
+    Match and download the results.
 
     Returns:
-        CSV file with slot assignments
+        CSV (default), Parquet or Feather file with slot assignments
     """
     try:
         # Validate inputs
         if mode not in ["auto", "sku", "sequence"]:
             raise HTTPException(status_code=400, detail=f"Invalid mode: {mode}")
 
+        if output_format not in DOWNLOAD_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Invalid format: {output_format}")
+
         if start_slot < 1:
             raise HTTPException(status_code=400, detail="start_slot must be >= 1")
 
-        # Read file
-        file_bytes = await file.read()
-
-        # Load CSV
-        df = load_csv(file_bytes)
-
-        # Parse keywords
-        exclude_list = [k.strip() for k in exclude_keywords.split(',') if k.strip()]
-        include_list = [k.strip() for k in include_keywords.split(',') if k.strip()]
-
-        # Match
-        matched_df, summary = match(
-            df,
-            mode=mode,
-            start_slot=start_slot,
-            exclude_keywords=exclude_list,
-            include_keywords=include_list
+        # Load and match in a worker thread to keep the event loop free
+        await file.seek(0)
+        matched_df, summary = await asyncio.to_thread(
+            _load_and_match,
+            file.file,
+            mode,
+            start_slot,
+            exclude_keywords,
+            include_keywords
         )
 
-        # Export to CSV
-        csv_bytes = export_csv(matched_df)
+        media_type, extension = DOWNLOAD_FORMATS[output_format]
+        headers = {
+            "Content-Disposition": f"attachment; filename=matched_orders.{extension}"
+        }
 
-        # Return as downloadable file
-        return StreamingResponse(
-            io.BytesIO(csv_bytes),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": "attachment; filename=matched_orders.csv"
-            }
+        # Stream CSV in row batches so the client gets bytes before the
+        # whole file is rendered
+        if output_format == "csv":
+            return StreamingResponse(
+                iter_csv(matched_df),
+                media_type=media_type,
+                headers=headers
+            )
+
+        # Columnar formats are written in one piece
+        output_bytes = await asyncio.to_thread(EXPORTERS[output_format], matched_df)
+        return Response(
+            content=output_bytes,
+            media_type=media_type,
+            headers=headers
         )
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -4,26 +4,118 @@ Handles SKU-based and sequence-based slot assignment.
 """
 
 import re
+import unicodedata
+from functools import lru_cache
 from io import BytesIO
-from typing import Tuple, Dict, List, Optional
+from typing import BinaryIO, Iterator, Tuple, Dict, List, Optional, Pattern, Union
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
 
+try:
+    import ahocorasick
+except ImportError:  # Optional: keyword filtering falls back to a regex alternation
+    ahocorasick = None
 
-def load_csv(file_bytes: bytes) -> pd.DataFrame:
+# Copy-on-Write (the pandas 3.0 default) lets match() share the caller's
+# column data instead of deep-copying the whole frame up front
+pd.set_option('mode.copy_on_write', True)
+
+# Values of the match_method output column
+MATCH_METHODS = ['sku', 'sequence', 'excluded', 'manual_review']
+
+# Arrow-backed string dtype used for text output columns
+_STRING_DTYPE = pd.ArrowDtype(pa.string())
+
+# Slot numbers up to this are checked for duplicates with np.bincount; a
+# stray huge SKU number falls back to hashing instead of a huge count array
+_BINCOUNT_MAX_SLOT = 1_000_000
+
+# Leading rows sampled to decide whether product names repeat enough to be
+# scanned once per distinct name
+_NAME_SAMPLE_SIZE = 10_000
+
+# Text columns the matcher reads. Declaring their type up front skips type
+# inference and keeps values exactly as written: SKUs like "007", and order
+# times with their original UTC offset (they're only parsed for sorting).
+_TEXT_COLUMNS = ('product name', 'sku', 'placed at')
+
+# First run of digits in a SKU is its slot number. A digit is any Unicode
+# decimal digit (category Nd): \d in Python's re, \p{Nd} in Arrow's RE2,
+# whose \d only covers ASCII.
+_SKU_SLOT_RE = re.compile(r'(?P<slot>\d+)')
+_ARROW_DIGIT = r'\p{Nd}'
+_ARROW_SKU_SLOT_PATTERN = r'(?P<slot>\p{Nd}+)'
+
+# Largest int64, for spotting digit runs too long for an Int64 slot
+_INT64_MAX_DIGITS = str(np.iinfo(np.int64).max)
+
+
+def _dedupe_column_names(names: List[str]) -> List[str]:
+    """
+    Rename repeated column names the way pd.read_csv does ("sku", "sku.1").
+
+    Args:
+        names: Column names from the CSV header
+
+    Returns:
+        Column names with every repeat given a numeric suffix
+    """
+    # Suffixes skip any name already in the header, as pandas does
+    taken = set(names)
+    seen: Dict[str, int] = {}
+    deduped = []
+    for name in names:
+        if name not in seen:
+            seen[name] = 0
+            deduped.append(name)
+            continue
+        new_name = name
+        while new_name in taken:
+            seen[name] += 1
+            new_name = f"{name}.{seen[name]}"
+        taken.add(new_name)
+        deduped.append(new_name)
+    return deduped
+
+
+def load_csv(source: Union[bytes, BinaryIO]) -> pd.DataFrame:
     """
-    Load CSV from bytes into a DataFrame.
+    Load CSV from bytes or a binary file object into a DataFrame.
+
+    File objects are parsed straight from the handle, so large uploads never
+    have to be held in memory as a single bytes blob.
 
     Args:
-        file_bytes: Raw CSV file bytes
+        source: Raw CSV file bytes, or a binary file object positioned at the start
 
     Returns:
         DataFrame with loaded CSV data
 
     Raises:
-        ValueError: If CSV is invalid or empty
+        ValueError: If CSV is invalid or empty. Rows with fewer fields than the
+            header are invalid; Arrow's reader doesn't pad them with nulls.
     """
     try:
-        df = pd.read_csv(BytesIO(file_bytes))
+        # Arrow's multithreaded CSV reader; Arrow-backed dtypes keep strings
+        # as Arrow arrays instead of Python objects
+        if isinstance(source, bytes):
+            source = BytesIO(source)
+        table = pacsv.read_csv(
+            source,
+            # Quoted values may span lines (e.g. multi-line product names);
+            # without this Arrow splits the file into blocks at raw newlines
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types={column: pa.string() for column in _TEXT_COLUMNS},
+                strings_can_be_null=True
+            )
+        )
+        table = table.rename_columns(_dedupe_column_names(table.column_names))
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
         if df.empty:
             raise ValueError("CSV file is empty")
         return df
@@ -48,7 +140,7 @@ def parse_sku_to_slot(sku: str) -> Optional[int]:
     Returns:
         Slot number as integer, or None if no valid number found
     """
-    if not sku or pd.isna(sku):
+    if pd.isna(sku) or not sku:
         return None
 
     # Convert to string and strip whitespace
@@ -56,14 +148,142 @@ def parse_sku_to_slot(sku: str) -> Optional[int]:
     if not sku_str:
         return None
 
-    # Try to extract first integer from the string
-    match = re.search(r'\d+', sku_str)
+    # Bare numeric SKUs don't need the regex
+    if sku_str.isdecimal():
+        return int(sku_str)
+
+    # Try to extract first integer from the string. The compiled search is
+    # faster than scanning characters in Python, even for short SKUs.
+    match = _SKU_SLOT_RE.search(sku_str)
     if match:
         return int(match.group())
 
     return None
 
 
+def _arrow_strings(values: pd.Series) -> pa.Array:
+    """
+    Get a column as Arrow strings, casting only if it isn't Arrow-backed already.
+
+    Args:
+        values: Column to convert
+
+    Returns:
+        Arrow string array (or chunked array) with the column's values
+    """
+    if values.dtype != _STRING_DTYPE:
+        values = values.astype('string').astype(_STRING_DTYPE)
+    return pa.array(values.array)
+
+
+def parse_sku_series(skus: pd.Series) -> pd.Series:
+    """
+    Extract slot numbers from a whole column of SKUs at once.
+
+    Vectorized counterpart of parse_sku_to_slot. The digits are extracted and
+    converted inside Arrow compute kernels, so no Python strings or ints are
+    created per row, except for the rare SKU written in non-ASCII digits.
+    Numbers too large for Int64 come back as <NA>, sending the row to review.
+
+    Args:
+        skus: SKU values to parse
+
+    Returns:
+        Nullable Int64 Series of slot numbers, <NA> where no number was found
+    """
+    matches = pc.extract_regex(_arrow_strings(skus), _ARROW_SKU_SLOT_PATTERN)
+    digits = pc.struct_field(matches, [0])
+
+    # Arrow only casts ASCII digits, so spell other scripts' digits in ASCII
+    non_ascii = pc.fill_null(pc.invert(pc.string_is_ascii(digits)), False)
+    if pc.any(non_ascii).as_py():
+        ascii_digits = [
+            ''.join(str(unicodedata.decimal(char)) for char in run)
+            for run in pc.filter(digits, non_ascii).to_pylist()
+        ]
+        digits = pc.replace_with_mask(digits, non_ascii, pa.array(ascii_digits, pa.string()))
+
+    # Null out runs that overflow int64 instead of failing the whole column;
+    # equal-length digit strings compare in numeric order
+    digits = pc.utf8_ltrim(digits, characters='0')
+    length = pc.utf8_length(digits)
+    fits = pc.or_(
+        pc.less(length, len(_INT64_MAX_DIGITS)),
+        pc.and_(
+            pc.equal(length, len(_INT64_MAX_DIGITS)),
+            pc.less_equal(digits, _INT64_MAX_DIGITS)
+        )
+    )
+    digits = pc.if_else(fits, digits, pa.scalar(None, pa.string()))
+    # A run of zeros trims to '', which is slot 0
+    digits = pc.if_else(pc.equal(length, 0), '0', digits)
+
+    slots = pc.cast(digits, pa.int64())
+    slots = slots.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+    return pd.Series(slots.array, index=skus.index)
+
+
+@lru_cache(maxsize=32)
+def _keyword_pattern(keywords: Tuple[str, ...]) -> Optional[Pattern]:
+    """
+    Compile lowercased keywords into a single alternation.
+
+    The pattern is meant to be run against lowercased text: a case-sensitive
+    search over pre-lowered names is about twice as fast as re.IGNORECASE.
+    Results are cached per keyword tuple, so the per-row helpers don't redo
+    the lowercasing and escaping on every call.
+
+    Args:
+        keywords: Keywords to match (any match counts)
+
+    Returns:
+        Compiled pattern, or None if there are no keywords
+    """
+    if not keywords:
+        return None
+
+    return re.compile('|'.join(re.escape(keyword.lower()) for keyword in keywords))
+
+
+@lru_cache(maxsize=32)
+def _keyword_automaton(keywords: Tuple[str, ...]) -> 'ahocorasick.Automaton':
+    """
+    Build an Aho-Corasick automaton over lowercased keywords.
+
+    Cached per keyword tuple like _keyword_pattern.
+
+    Args:
+        keywords: Non-empty keywords to match
+
+    Returns:
+        Automaton that finds every keyword in a single pass over the text
+    """
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword.lower(), keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+def _contains_keyword(text_lower: str, keywords: Tuple[str, ...]) -> bool:
+    """
+    Check one lowercased string for any of the keywords.
+
+    Args:
+        text_lower: Lowercased text to search
+        keywords: Keywords to look for (any match counts)
+
+    Returns:
+        True if the text contains a keyword
+    """
+    if ahocorasick is None or not all(keywords):
+        # An empty keyword matches everything, which only the regex handles
+        return bool(_keyword_pattern(keywords).search(text_lower))
+
+    # Stop at the first hit instead of collecting every match
+    return next(_keyword_automaton(keywords).iter(text_lower), None) is not None
+
+
 def should_exclude_row(row: pd.Series, exclude_keywords: List[str]) -> bool:
     """
     Check if a row should be excluded based on keywords.
@@ -79,13 +299,8 @@ def should_exclude_row(row: pd.Series, exclude_keywords: List[str]) -> bool:
         return False
 
     # Check product name column (case-insensitive)
-    product_name = str(row.get('product name', '')).lower()
-
-    for keyword in exclude_keywords:
-        if keyword.lower() in product_name:
-            return True
-
-    return False
+    product_lower = str(row.get('product name', '')).lower()
+    return _contains_keyword(product_lower, tuple(exclude_keywords))
 
 
 def should_include_row(row: pd.Series, include_keywords: List[str]) -> bool:
@@ -103,13 +318,100 @@ def should_include_row(row: pd.Series, include_keywords: List[str]) -> bool:
         return True  # No filter means include all
 
     # Check product name column (case-insensitive)
-    product_name = str(row.get('product name', '')).lower()
+    product_lower = str(row.get('product name', '')).lower()
+    return _contains_keyword(product_lower, tuple(include_keywords))
+
+
+@lru_cache(maxsize=32)
+def _arrow_keyword_pattern(keywords: Tuple[str, ...]) -> str:
+    """
+    Build the RE2 alternation used against Arrow-lowercased product names.
+
+    Keywords are lowercased with the same Arrow kernel as the names (Python's
+    str.lower uses full case mapping, e.g. "İ" -> "i̇", which Arrow doesn't),
+    and (?i) folds the remaining variants such as final sigma.
+
+    Args:
+        keywords: Keywords to match (any match counts)
+
+    Returns:
+        RE2 pattern string
+    """
+    lowered = pc.utf8_lower(pa.array(keywords, pa.string())).to_pylist()
+    return '(?i)' + '|'.join(re.escape(keyword) for keyword in lowered)
+
+
+def _keyword_mask(product_lower: pd.Series, keywords: List[str]) -> pd.Series:
+    """
+    Check a column of lowercased product names against keywords.
+
+    The alternation runs through Arrow's RE2 kernel, which scans each name once
+    no matter how many keywords there are, without converting names to Python
+    strings. Missing names never match.
 
-    for keyword in include_keywords:
-        if keyword.lower() in product_name:
-            return True
+    Args:
+        product_lower: Lowercased product names as Arrow strings
+        keywords: Keywords to look for (any match counts)
+
+    Returns:
+        Boolean Series, True where the product name contains a keyword
+    """
+    pattern = _arrow_keyword_pattern(tuple(keywords))
+    return product_lower.str.contains(pattern, regex=True).fillna(False).astype(bool)
 
-    return False
+
+def _product_lower(df: pd.DataFrame) -> pd.Series:
+    """
+    Lowercase the product name column, or blanks if the column is missing.
+
+    Args:
+        df: DataFrame with order data
+
+    Returns:
+        Series of lowercased product names as Arrow strings
+    """
+    if 'product name' not in df.columns:
+        return pd.Series('', index=df.index, dtype=_STRING_DTYPE)
+
+    names = df['product name']
+    if names.dtype != _STRING_DTYPE:
+        if not pd.api.types.is_string_dtype(names):
+            # Stringify each value first, as the per-row checks do
+            names = names.astype(str)
+        names = names.astype(_STRING_DTYPE)
+    return names.str.lower()
+
+
+def exclude_mask(df: pd.DataFrame, exclude_keywords: Optional[List[str]]) -> pd.Series:
+    """
+    Vectorized should_exclude_row: check every row at once.
+
+    Args:
+        df: DataFrame to check
+        exclude_keywords: List of keywords to check against
+
+    Returns:
+        Boolean Series, True for rows that should be excluded
+    """
+    if not exclude_keywords:
+        return pd.Series(False, index=df.index)
+    return _keyword_mask(_product_lower(df), exclude_keywords)
+
+
+def include_mask(df: pd.DataFrame, include_keywords: Optional[List[str]]) -> pd.Series:
+    """
+    Vectorized should_include_row: check every row at once.
+
+    Args:
+        df: DataFrame to check
+        include_keywords: List of keywords that must be present (empty = include all)
+
+    Returns:
+        Boolean Series, True for rows that should be included
+    """
+    if not include_keywords:
+        return pd.Series(True, index=df.index)
+    return _keyword_mask(_product_lower(df), include_keywords)
 
 
 def detect_mode(df: pd.DataFrame) -> str:
@@ -125,17 +427,223 @@ def detect_mode(df: pd.DataFrame) -> str:
     if 'sku' not in df.columns:
         return "sequence"
 
-    # Count non-empty SKUs that can be parsed to slots
-    valid_skus = df['sku'].apply(lambda x: parse_sku_to_slot(x) is not None).sum()
-    total_rows = len(df)
-
-    if total_rows == 0:
+    if len(df) == 0:
         return "sequence"
 
-    sku_ratio = valid_skus / total_rows
+    # Share of SKUs that can be parsed to slots, i.e. that contain a digit;
+    # a boolean scan over the Arrow strings is enough, no need to extract
+    has_digit = pc.match_substring_regex(_arrow_strings(df['sku']), _ARROW_DIGIT)
+    sku_ratio = pc.sum(pc.fill_null(has_digit, False)).as_py() / len(df)
     return "sku" if sku_ratio >= 0.8 else "sequence"
 
 
+def _keep_mask(
+    df: pd.DataFrame,
+    exclude_keywords: List[str],
+    include_keywords: List[str]
+) -> pd.Series:
+    """
+    Flag rows that pass the exclude/include keyword filters.
+
+    Args:
+        df: DataFrame with order data
+        exclude_keywords: Keywords that exclude a row
+        include_keywords: Keywords a row must contain (empty = include all)
+
+    Returns:
+        Boolean Series, True for rows that should be matched
+    """
+    # Without filters every row is kept; skip lowercasing names entirely
+    if not exclude_keywords and not include_keywords:
+        return pd.Series(np.ones(len(df), dtype=bool), index=df.index)
+
+    # Same checks as exclude_mask/include_mask, but product names are
+    # lowercased a single time for both filters
+    product_lower = _product_lower(df)
+
+    # Exports repeat the same names ("Shipping Fee", giveaways, ...). If the
+    # leading rows do, scan each distinct name once and map hits back by code;
+    # missing names get code -1 and never match.
+    codes = None
+    sample = product_lower.head(_NAME_SAMPLE_SIZE)
+    if sample.nunique() <= len(sample) // 2:
+        codes, uniques = pd.factorize(product_lower)
+        product_lower = pd.Series(uniques)
+
+    # One boolean array per active filter, ANDed together in a single reduce.
+    # The filters stay separate scans: a fused exclude|include alternation
+    # only reports the leftmost hit, so it would miss an exclude keyword that
+    # comes after an include keyword in the same name.
+    filters = []
+    if exclude_keywords:
+        filters.append(~_keyword_mask(product_lower, exclude_keywords).to_numpy())
+    if include_keywords:
+        filters.append(_keyword_mask(product_lower, include_keywords).to_numpy())
+    keep = np.logical_and.reduce(filters)
+
+    if codes is not None:
+        # A missing name matches no keyword, so it's kept unless including
+        keep = np.append(keep, not include_keywords)[codes]
+
+    return pd.Series(keep, index=df.index)
+
+
+def _match_sku(
+    df: pd.DataFrame,
+    start_slot: int,
+    exclude_keywords: List[str],
+    include_keywords: List[str]
+) -> Tuple[pd.DataFrame, pd.Series, pd.Series, pd.Series]:
+    """
+    SKU mode: each kept row's slot is the first integer in its SKU.
+
+    Args:
+        df: DataFrame with order data
+        start_slot: Unused; SKUs carry their own slot numbers
+        exclude_keywords: Keywords that exclude a row
+        include_keywords: Keywords a row must contain (empty = include all)
+
+    Returns:
+        Tuple of (df, keep_mask, slots, review_mask)
+    """
+    keep_mask = _keep_mask(df, exclude_keywords, include_keywords)
+
+    # Extract the first integer of every SKU in one pass
+    if 'sku' in df.columns:
+        slots = parse_sku_series(df['sku'])
+    else:
+        slots = pd.Series(pd.NA, index=df.index, dtype='Int64')
+
+    # Kept rows without a usable SKU go to manual review
+    review_mask = keep_mask & slots.isna()
+    return df, keep_mask, slots, review_mask
+
+
+def _parse_placed_at(placed_at: pd.Series) -> pd.Series:
+    """
+    Parse purchase timestamps; values that can't be parsed become NaT.
+
+    NumPy datetime columns are returned as they are. Text (as loaded by
+    load_csv) is parsed as ISO 8601 in one pass, with per-column format
+    inference only when the first value isn't ISO 8601. Times with offsets are
+    converted to UTC so that mixed offsets still sort correctly.
+
+    Args:
+        placed_at: Raw "placed at" column
+
+    Returns:
+        Datetime Series aligned with the input
+    """
+    if pd.api.types.is_datetime64_any_dtype(placed_at.dtype):
+        return placed_at
+
+    valid = placed_at.notna().to_numpy()
+    try:
+        if valid.any():
+            pd.to_datetime(placed_at.iloc[valid.argmax()], format='ISO8601')
+        return pd.to_datetime(
+            placed_at, format='ISO8601', errors='coerce', utc=True, cache=True
+        )
+    except (ValueError, TypeError):
+        return pd.to_datetime(placed_at, errors='coerce', utc=True, cache=True)
+
+
+def _placed_at_order(placed_at: pd.Series) -> np.ndarray:
+    """
+    Get the stable row order by purchase time, with unparseable times last.
+
+    Args:
+        placed_at: Raw "placed at" column
+
+    Returns:
+        Array of row positions in purchase order
+    """
+    dtype = placed_at.dtype
+    if isinstance(dtype, pd.ArrowDtype) and pa.types.is_timestamp(dtype.pyarrow_dtype):
+        # Arrow sorts its own timestamps; pd.to_datetime would go through
+        # a Python object per row
+        order = pc.sort_indices(pa.array(placed_at.array), null_placement='at_end')
+        return order.to_numpy()
+
+    return np.argsort(_parse_placed_at(placed_at).values, kind='stable')
+
+
+def _match_sequence(
+    df: pd.DataFrame,
+    start_slot: int,
+    exclude_keywords: List[str],
+    include_keywords: List[str]
+) -> Tuple[pd.DataFrame, pd.Series, pd.Series, pd.Series]:
+    """
+    Sequence mode: kept rows get consecutive slots in order of purchase.
+
+    Args:
+        df: DataFrame with order data
+        start_slot: Slot number for the first kept row
+        exclude_keywords: Keywords that exclude a row
+        include_keywords: Keywords a row must contain (empty = include all)
+
+    Returns:
+        Tuple of (df, keep_mask, slots, review_mask), with df sorted by time
+    """
+    # Sort by timestamp if available, otherwise preserve file order
+    if 'placed at' in df.columns:
+        # Reorder by a stable permutation, so no helper column is
+        # materialized and equal timestamps keep file order; NaT sorts last
+        try:
+            order = _placed_at_order(df['placed at'])
+            if not np.array_equal(order, np.arange(len(order))):
+                df = df.iloc[order]
+        except:
+            # Fall back to original order
+            pass
+
+    keep_mask = _keep_mask(df, exclude_keywords, include_keywords)
+
+    # Excluded rows don't consume slots: a running count of kept rows gives
+    # each one its slot in a single pass, and everything else stays <NA>
+    keep = keep_mask.to_numpy()
+    slots = pd.Series(
+        pd.arrays.IntegerArray(np.cumsum(keep, dtype=np.int64) + (start_slot - 1), ~keep),
+        index=df.index
+    )
+
+    review_mask = pd.Series(False, index=df.index)
+    return df, keep_mask, slots, review_mask
+
+
+# Slot assignment for each mode, chosen once per match() call
+_MODE_MATCHERS = {
+    'sku': _match_sku,
+    'sequence': _match_sequence,
+}
+
+
+def _duplicate_slots(slots: pd.Series) -> Tuple[np.ndarray, int]:
+    """
+    Flag rows whose slot number is shared with another row.
+
+    Args:
+        slots: Nullable Int64 slot numbers, <NA> for rows without a slot
+
+    Returns:
+        Tuple of (duplicate mask, number of distinct duplicated slots)
+    """
+    present = slots.notna().to_numpy()
+    numbers = slots.to_numpy(dtype=np.int64, na_value=0)[present]
+
+    # Slots are small non-negative integers in practice, so counting them
+    # in a dense array beats hashing
+    if numbers.size and numbers.min() >= 0 and numbers.max() <= _BINCOUNT_MAX_SLOT:
+        counts = np.bincount(numbers)
+        dup_mask = np.zeros(len(slots), dtype=bool)
+        dup_mask[present] = counts[numbers] > 1
+        return dup_mask, int(np.count_nonzero(counts > 1))
+
+    dup_mask = (slots.notna() & slots.duplicated(keep=False)).to_numpy()
+    return dup_mask, int(slots[dup_mask].nunique())
+
+
 def match(
     df: pd.DataFrame,
     mode: str = "auto",
@@ -169,114 +677,52 @@ def match(
     if mode == "auto":
         mode = detect_mode(df)
 
-    if mode not in ["sku", "sequence"]:
+    if mode not in _MODE_MATCHERS:
         raise ValueError(f"Invalid mode: {mode}. Must be 'auto', 'sku', or 'sequence'")
 
-    # Initialize output columns
-    df = df.copy()
-    df['slot'] = None
-    df['matched_item_label'] = None
-    df['match_method'] = None
-    df['needs_review'] = False
-    df['review_reason'] = ''
-
     # Track statistics
     total_rows = len(df)
-    excluded_count = 0
-    matched_count = 0
-    needs_review_count = 0
-    slot_usage = {}
-
-    if mode == "sku":
-        # SKU-based matching
-        for idx, row in df.iterrows():
-            # Check exclusions first
-            if should_exclude_row(row, exclude_keywords):
-                df.at[idx, 'match_method'] = 'excluded'
-                excluded_count += 1
-                continue
-
-            # Check inclusions
-            if not should_include_row(row, include_keywords):
-                df.at[idx, 'match_method'] = 'excluded'
-                excluded_count += 1
-                continue
-
-            # Try to parse SKU
-            sku = row.get('sku')
-            slot_num = parse_sku_to_slot(sku)
-
-            if slot_num is None:
-                df.at[idx, 'match_method'] = 'manual_review'
-                df.at[idx, 'needs_review'] = True
-                df.at[idx, 'review_reason'] = 'sku_missing_or_invalid'
-                needs_review_count += 1
-            else:
-                df.at[idx, 'slot'] = slot_num
-                df.at[idx, 'matched_item_label'] = f"Item #{slot_num}"
-                df.at[idx, 'match_method'] = 'sku'
-                matched_count += 1
-
-                # Track slot usage for duplicate detection
-                if slot_num in slot_usage:
-                    slot_usage[slot_num].append(idx)
-                else:
-                    slot_usage[slot_num] = [idx]
-
-    else:  # sequence mode
-        # Sort by timestamp if available, otherwise preserve file order
-        if 'placed at' in df.columns:
-            # Try to parse as datetime
-            try:
-                df['_sort_key'] = pd.to_datetime(df['placed at'], errors='coerce')
-                df = df.sort_values('_sort_key')
-            except:
-                # Fall back to original order
-                pass
-
-        current_slot = start_slot
-
-        for idx, row in df.iterrows():
-            # Check exclusions first
-            if should_exclude_row(row, exclude_keywords):
-                df.at[idx, 'match_method'] = 'excluded'
-                excluded_count += 1
-                continue
-
-            # Check inclusions
-            if not should_include_row(row, include_keywords):
-                df.at[idx, 'match_method'] = 'excluded'
-                excluded_count += 1
-                continue
-
-            # Assign sequential slot
-            df.at[idx, 'slot'] = current_slot
-            df.at[idx, 'matched_item_label'] = f"Item #{current_slot}"
-            df.at[idx, 'match_method'] = 'sequence'
-            matched_count += 1
-
-            # Track slot usage
-            if current_slot in slot_usage:
-                slot_usage[current_slot].append(idx)
-            else:
-                slot_usage[current_slot] = [idx]
-
-            current_slot += 1
-
-    # Detect duplicate slots
-    duplicate_count = 0
-    for slot_num, indices in slot_usage.items():
-        if len(indices) > 1:
-            duplicate_count += 1
-            for idx in indices:
-                df.at[idx, 'needs_review'] = True
-                existing_reason = df.at[idx, 'review_reason']
-                df.at[idx, 'review_reason'] = (
-                    f"{existing_reason}; duplicate_slot" if existing_reason
-                    else "duplicate_slot"
-                )
-                if df.at[idx, 'match_method'] != 'manual_review':
-                    needs_review_count += 1
+
+    # Dispatch once on mode; keyword filters run column-wide in the kernel
+    df, keep_mask, slots, review_mask = _MODE_MATCHERS[mode](
+        df, start_slot, exclude_keywords, include_keywords
+    )
+    matched_mask = keep_mask & slots.notna()
+    matched_slots = slots.where(matched_mask)
+
+    method_codes = np.select(
+        [~keep_mask, matched_mask],
+        [MATCH_METHODS.index('excluded'), MATCH_METHODS.index(mode)],
+        default=MATCH_METHODS.index('manual_review')
+    )
+
+    dup_mask, duplicate_count = _duplicate_slots(matched_slots)
+
+    # Plain NumPy bool column, set in one go from both review masks
+    review = review_mask.to_numpy()
+    needs_review = review | dup_mask
+
+    review_reason = np.where(review, 'sku_missing_or_invalid', '').astype(object)
+    review_reason[dup_mask] = np.where(
+        review[dup_mask], 'sku_missing_or_invalid; duplicate_slot', 'duplicate_slot'
+    )
+
+    # Add every output column in a single assign, which also leaves the
+    # caller's frame untouched
+    df = df.assign(
+        slot=matched_slots,
+        matched_item_label=('Item #' + slots.astype(_STRING_DTYPE)).where(matched_mask),
+        match_method=pd.Categorical.from_codes(
+            method_codes.astype(np.int8), categories=MATCH_METHODS
+        ),
+        needs_review=needs_review,
+        review_reason=pd.array(review_reason, dtype=_STRING_DTYPE)
+    )
+
+    # Summary counts are single reductions over the NumPy masks
+    excluded_count = total_rows - int(np.count_nonzero(keep_mask.to_numpy()))
+    matched_count = int(np.count_nonzero(matched_mask.to_numpy()))
+    needs_review_count = int(np.count_nonzero(needs_review))
 
     # Build summary
     summary = {
@@ -307,3 +753,62 @@ def export_csv(df: pd.DataFrame) -> bytes:
     output = BytesIO()
     df.to_csv(output, index=False)
     return output.getvalue()
+
+
+def iter_csv(df: pd.DataFrame, chunk_size: int = 50_000) -> Iterator[bytes]:
+    """
+    Export DataFrame to CSV in row batches.
+
+    Yields the header first and then one encoded batch at a time, so a
+    response can start streaming before the whole file has been rendered.
+
+    Args:
+        df: DataFrame to export
+        chunk_size: Number of rows per batch
+
+    Yields:
+        CSV data as bytes
+    """
+    yield df.iloc[:0].to_csv(index=False).encode('utf-8')
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        yield chunk.to_csv(index=False, header=False).encode('utf-8')
+
+
+def export_parquet(df: pd.DataFrame) -> bytes:
+    """
+    Export DataFrame to zstd-compressed Parquet bytes.
+
+    Args:
+        df: DataFrame to export
+
+    Returns:
+        Parquet data as bytes
+    """
+    output = BytesIO()
+    df.to_parquet(output, engine='pyarrow', compression='zstd', index=False)
+    return output.getvalue()
+
+
+def export_feather(df: pd.DataFrame) -> bytes:
+    """
+    Export DataFrame to zstd-compressed Feather (Arrow IPC) bytes.
+
+    Args:
+        df: DataFrame to export
+
+    Returns:
+        Feather data as bytes
+    """
+    output = BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    feather.write_feather(table, output, compression='zstd')
+    return output.getvalue()
+
+
+# Output formats supported by the CLI and the /download endpoint
+EXPORTERS = {
+    'csv': export_csv,
+    'parquet': export_parquet,
+    'feather': export_feather,
+}
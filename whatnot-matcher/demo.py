@@ -3,7 +3,7 @@ Quick demonstration of the Whatnot Slot Matcher.
 Shows both SKU mode and Sequence mode with exclusions.
 """
 
-from app.matcher import load_csv, match, export_csv
+from app.matcher import load_csv, match, export_csv, export_parquet
 
 
 def main():
@@ -29,7 +29,7 @@ def main():
     print()
 
     matched_df, summary = match(
-        df.copy(),
+        df,
         mode='auto',
         start_slot=1,
         exclude_keywords=['givy', 'shipping', 'tip']
@@ -100,6 +100,11 @@ def main():
         f.write(csv_bytes_seq)
     print("   Saved: demo_output_sequence.csv")
 
+    parquet_bytes = export_parquet(matched_df)
+    with open('demo_output_sku.parquet', 'wb') as f:
+        f.write(parquet_bytes)
+    print("   Saved: demo_output_sku.parquet")
+
     print("\n" + "=" * 60)
     print("Demo Complete!")
     print("=" * 60)
@@ -3,16 +3,109 @@ Unit tests for matcher module.
 """
 
 import pytest
+from io import BytesIO
 import pandas as pd
+import pyarrow as pa
+from app import matcher
 from app.matcher import (
+    load_csv,
     parse_sku_to_slot,
+    parse_sku_series,
     should_exclude_row,
     should_include_row,
+    exclude_mask,
+    include_mask,
     detect_mode,
-    match
+    match,
+    export_csv,
+    iter_csv,
+    export_parquet,
+    export_feather
 )
 
 
+class TestLoadCSV:
+    """Test CSV loading."""
+
+    def test_load_csv_arrow_dtypes(self):
+        """Test loaded columns are Arrow-backed and still match correctly."""
+        df = load_csv(
+            b"product name,sku,price\n"
+            b"Item A,ITEM-5,10.00\n"
+            b"Item B,,12.50\n"
+        )
+
+        assert isinstance(df['product name'].dtype, pd.ArrowDtype)
+        assert isinstance(df['sku'].dtype, pd.ArrowDtype)
+
+        matched_df, summary = match(df, mode='sku')
+
+        assert matched_df['slot'].dtype == 'Int64'
+        assert matched_df['match_method'].dtype == 'category'
+        assert matched_df['needs_review'].dtype == bool
+        assert matched_df['match_method'].tolist() == ['sku', 'manual_review']
+        assert summary['needs_review'] == 1
+
+    def test_load_csv_keeps_sku_text(self):
+        """Test numeric-looking SKUs are loaded as text, not integers."""
+        df = load_csv(b"product name,sku\nItem A,007\nItem B,12\n")
+
+        assert df['sku'].tolist() == ['007', '12']
+        assert parse_sku_series(df['sku']).tolist() == [7, 12]
+
+    def test_load_csv_file_object(self):
+        """Test loading from a binary file object matches loading from bytes."""
+        data = b"product name,sku\nItem A,ITEM-5\nItem B,ITEM-12\n"
+
+        pd.testing.assert_frame_equal(load_csv(BytesIO(data)), load_csv(data))
+
+    def test_load_csv_multiline_quoted_values(self):
+        """Test quoted names with newlines load when the file spans several blocks."""
+        rows = b"".join(
+            b'"Pokemon Card %d\nHolo Rare, mint",ITEM-%d\n' % (i, i) for i in range(50_000)
+        )
+        data = b"product name,sku\n" + rows
+        assert len(data) > 2 * 1024 * 1024
+
+        df = load_csv(data)
+
+        assert len(df) == 50_000
+        assert df['product name'].iloc[-1] == "Pokemon Card 49999\nHolo Rare, mint"
+        assert df['sku'].iloc[-1] == "ITEM-49999"
+
+    def test_load_csv_short_rows_rejected(self):
+        """Test rows with missing trailing fields are reported as invalid."""
+        with pytest.raises(ValueError, match="Failed to load CSV"):
+            load_csv(b"product name,sku,price\nItem A,ITEM-1\n")
+
+    def test_load_csv_keeps_placed_at_text(self):
+        """Test order times with UTC offsets are exported exactly as uploaded."""
+        data = (
+            b"product name,sku,placed at\n"
+            b"Item B,ITEM-2,2024-01-15T10:00:00-05:00\n"
+            b"Item A,ITEM-1,2024-01-15T14:30:00+00:00\n"
+        )
+
+        matched_df, summary = match(load_csv(data), mode='sequence')
+        exported = export_csv(matched_df).decode()
+
+        # 14:30 UTC is before 10:00 at -05:00 (15:00 UTC)
+        assert matched_df['product name'].tolist() == ['Item A', 'Item B']
+        assert "2024-01-15T10:00:00-05:00" in exported
+        assert "2024-01-15T14:30:00+00:00" in exported
+
+    def test_load_csv_duplicate_headers(self):
+        """Test repeated column names get suffixes like pd.read_csv gives them."""
+        df = load_csv(b"product name,sku,sku,sku.1\nItem A,ITEM-1,ITEM-2,x\n")
+
+        assert list(df.columns) == ['product name', 'sku', 'sku.2', 'sku.1']
+
+    def test_load_csv_empty(self):
+        """Test loading a CSV with no rows."""
+        with pytest.raises(ValueError):
+            load_csv(b"product name,sku\n")
+
+
 class TestSKUParsing:
     """Test SKU parsing logic."""
 
@@ -24,6 +117,7 @@ class TestSKUParsing:
         assert parse_sku_to_slot("SLOT:5") == 5
         assert parse_sku_to_slot("#42") == 42
         assert parse_sku_to_slot("123") == 123
+        assert parse_sku_to_slot("007") == 7
 
     def test_parse_sku_edge_cases(self):
         """Test edge cases in SKU parsing."""
@@ -42,6 +136,36 @@ class TestSKUParsing:
         """Test SKU parsing with whitespace."""
         assert parse_sku_to_slot("  ITEM-5  ") == 5
         assert parse_sku_to_slot("\tITEM-10\n") == 10
+        assert parse_sku_to_slot(" 42 ") == 42
+
+    def test_parse_sku_series_matches_scalar(self):
+        """Test column parsing agrees with the scalar parser."""
+        skus = ["ITEM-001", "item_12", "SLOT:5", "#42", "123", "ITEM-001-2023",
+                "  ITEM-5  ", "", None, "   ", "NO_NUMBERS"]
+
+        slots = parse_sku_series(pd.Series(skus, dtype=object))
+
+        assert slots.dtype == 'Int64'
+        assert [None if pd.isna(s) else s for s in slots] == [
+            parse_sku_to_slot(sku) for sku in skus
+        ]
+
+    def test_parse_sku_series_non_ascii_digits(self):
+        """Test digits from other scripts parse the same as in the scalar parser."""
+        skus = ["ITEM-\u0663\u0664", "\u0661\u0662", "SLOT-\u0967"]
+
+        slots = parse_sku_series(pd.Series(skus, dtype=object))
+
+        assert slots.tolist() == [parse_sku_to_slot(sku) for sku in skus] == [34, 12, 1]
+
+    def test_parse_sku_series_overlong_numbers(self):
+        """Test numbers too large for Int64 become <NA> instead of raising."""
+        skus = ["ITEM-99999999999999999999", "ITEM-0000000000000000000000005", "ITEM-7"]
+
+        slots = parse_sku_series(pd.Series(skus, dtype=object))
+
+        assert pd.isna(slots.iloc[0])
+        assert slots.iloc[1:].tolist() == [5, 7]
 
 
 class TestExclusionLogic:
@@ -88,6 +212,69 @@ class TestExclusionLogic:
         assert should_exclude_row(row, []) is False
         assert should_exclude_row(row, None) is False
 
+    def test_exclude_mask_matches_row_check(self):
+        """Test the column-wide exclusion agrees with the per-row check."""
+        df = pd.DataFrame({
+            'product name': ['Free GIVY', 'Shipping Fee', 'Pokemon Card', None]
+        })
+        keywords = ['givy', 'shipping']
+
+        mask = exclude_mask(df, keywords)
+
+        assert mask.tolist() == [True, True, False, False]
+        assert mask.tolist() == [
+            should_exclude_row(row, keywords) for _, row in df.iterrows()
+        ]
+        assert not exclude_mask(df, []).any()
+
+        # Non-ASCII case pairs, including ones where Arrow and Python
+        # lowercase differently
+        df = pd.DataFrame({
+            'product name': ['İstanbul card', 'ΟΔΟΣ poster', 'Straße sign', 'Plain item']
+        })
+        for keyword in ['İstanbul', 'οδος', 'ΟΔΟΣ', 'STRASSE', 'straße', 'ÉCLAIR']:
+            assert exclude_mask(df, [keyword]).tolist() == [
+                should_exclude_row(row, [keyword]) for _, row in df.iterrows()
+            ], keyword
+        assert exclude_mask(df, ['İstanbul', 'οδος']).tolist() == [True, True, False, False]
+
+    def test_exclude_mask_arrow_strings(self):
+        """Test Arrow-backed names from load_csv, where a missing name never matches."""
+        df = load_csv(b"product name,sku\nFree GIVY,1\n,2\nPokemon Card,3\n")
+
+        assert exclude_mask(df, ['givy', 'na']).tolist() == [True, False, False]
+
+    def test_match_repeated_names(self):
+        """Test filtering is unchanged when repeated names are scanned once each."""
+        names = ['Shipping Fee', None, 'Pokemon Card', 'Givy Pack'] * 50
+        csv = 'product name,price\n' + ''.join(f'{n or ""},1\n' for n in names)
+        df = load_csv(csv.encode())
+
+        matched_df, summary = match(
+            df, mode='sequence', exclude_keywords=['shipping'], include_keywords=['pokemon', 'givy']
+        )
+
+        assert matched_df['match_method'].tolist()[:4] == [
+            'excluded', 'excluded', 'sequence', 'sequence'
+        ]
+        assert summary['matched'] == 100
+
+        matched_df, summary = match(df, mode='sequence', exclude_keywords=['shipping'])
+
+        assert summary['excluded'] == 50
+
+    def test_should_exclude_row_without_ahocorasick(self, monkeypatch):
+        """Test the per-row check gives the same answers on the regex fallback."""
+        rows = [pd.Series({'product name': name})
+                for name in ['Free GIVY', 'Shipping Fee', 'Pokemon Card']]
+        keywords = ['givy', 'shipping', 'tip']
+
+        expected = [should_exclude_row(row, keywords) for row in rows]
+        monkeypatch.setattr(matcher, 'ahocorasick', None)
+
+        assert [should_exclude_row(row, keywords) for row in rows] == expected
+        assert expected == [True, True, False]
+
 
 class TestInclusionLogic:
     """Test inclusion logic."""
@@ -117,6 +304,48 @@ class TestInclusionLogic:
             keywords
         ) is False
 
+    def test_should_include_row_without_ahocorasick(self, monkeypatch):
+        """Test the per-row check gives the same answers on the regex fallback."""
+        rows = [pd.Series({'product name': name})
+                for name in ['Pokemon Card', 'YuGiOh Card', 'Magic Card']]
+        keywords = ['pokemon', 'yugioh']
+
+        expected = [should_include_row(row, keywords) for row in rows]
+        monkeypatch.setattr(matcher, 'ahocorasick', None)
+
+        assert [should_include_row(row, keywords) for row in rows] == expected
+        assert expected == [True, True, False]
+
+    def test_include_mask_matches_row_check(self):
+        """Test the column-wide inclusion agrees with the per-row check."""
+        df = pd.DataFrame({
+            'product name': ['Pokemon Card', 'YuGiOh Card', 'Magic Card']
+        })
+        keywords = ['pokemon', 'yugioh']
+
+        mask = include_mask(df, keywords)
+
+        assert mask.tolist() == [True, True, False]
+        assert mask.tolist() == [
+            should_include_row(row, keywords) for _, row in df.iterrows()
+        ]
+        assert include_mask(df, None).all()
+
+    def test_exclude_wins_over_include(self):
+        """Test a name with both kinds of keyword is excluded, wherever they appear."""
+        df = pd.DataFrame({
+            'product name': ['Pokemon Givy', 'Givy Pokemon', 'Pokemon Card', 'Magic Card']
+        })
+
+        matched_df, summary = match(
+            df, mode='sequence', exclude_keywords=['givy'], include_keywords=['pokemon']
+        )
+
+        assert matched_df['match_method'].tolist() == [
+            'excluded', 'excluded', 'sequence', 'excluded'
+        ]
+        assert list(matched_df['slot'].dropna()) == [1]
+
 
 class TestModeDetection:
     """Test automatic mode detection."""
@@ -213,6 +442,56 @@ class TestSequenceMatching:
         # Should be sorted by timestamp
         sorted_items = matched_df.sort_values('slot')['product name'].tolist()
         assert sorted_items == ['Item A', 'Item B', 'Item C']
+        assert '_sort_key' not in matched_df.columns
+
+    def test_sequence_timestamp_ties_keep_file_order(self):
+        """Test rows with equal timestamps keep their file order."""
+        df = pd.DataFrame({
+            'product name': ['Item B', 'Item C', 'Item A'],
+            'placed at': ['2024-01-02 10:00', '2024-01-02 10:00', '2024-01-01 10:00']
+        })
+
+        matched_df, summary = match(df, mode='sequence', start_slot=1)
+
+        assert matched_df['product name'].tolist() == ['Item A', 'Item B', 'Item C']
+        assert list(matched_df['slot']) == [1, 2, 3]
+
+    def test_sequence_unparseable_timestamps_sort_last(self):
+        """Test rows with missing or invalid timestamps go after dated rows."""
+        df = pd.DataFrame({
+            'product name': ['Item B', 'Item X', 'Item Y', 'Item A'],
+            'placed at': ['2024-01-02 10:00', 'not a date', None, '2024-01-01 10:00']
+        })
+
+        matched_df, summary = match(df, mode='sequence', start_slot=1)
+
+        assert matched_df['product name'].tolist() == ['Item A', 'Item B', 'Item X', 'Item Y']
+        assert list(matched_df['slot']) == [1, 2, 3, 4]
+
+    def test_sequence_arrow_timestamps(self):
+        """Test Arrow timestamp columns sort stably with missing times last."""
+        df = pd.DataFrame({
+            'product name': ['Item C', 'Item X', 'Item A', 'Item B'],
+            'placed at': pd.array(
+                [pd.Timestamp('2024-01-02'), None, pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02')],
+                dtype=pd.ArrowDtype(pa.timestamp('s'))
+            )
+        })
+
+        matched_df, summary = match(df, mode='sequence', start_slot=1)
+
+        assert matched_df['product name'].tolist() == ['Item A', 'Item C', 'Item B', 'Item X']
+
+    def test_sequence_non_iso_timestamps(self):
+        """Test timestamps that aren't ISO 8601 are still sorted."""
+        df = pd.DataFrame({
+            'product name': ['Item B', 'Item A'],
+            'placed at': ['01/02/2024 10:00', '12/31/2023 09:00']
+        })
+
+        matched_df, summary = match(df, mode='sequence', start_slot=1)
+
+        assert matched_df['product name'].tolist() == ['Item A', 'Item B']
 
 
 class TestSKUMatching:
@@ -243,11 +522,37 @@ class TestSKUMatching:
 
         assert matched_df.iloc[0]['slot'] == 5
         assert pd.isna(matched_df.iloc[1]['slot'])
-        assert matched_df.iloc[1]['needs_review'] is True
+        assert matched_df['needs_review'].dtype == bool
+        assert matched_df['needs_review'].tolist()[1] is True
         assert matched_df.iloc[2]['slot'] == 3
         assert summary['matched'] == 2
         assert summary['needs_review'] == 1
 
+    def test_sku_overlong_number_needs_review(self):
+        """Test a SKU number too large for a slot goes to review, not an error."""
+        df = pd.DataFrame({
+            'product name': ['Item A', 'Item B'],
+            'sku': ['ITEM-99999999999999999999', 'ITEM-3']
+        })
+
+        matched_df, summary = match(df, mode='sku')
+
+        assert matched_df['match_method'].tolist() == ['manual_review', 'sku']
+        assert summary['needs_review'] == 1
+
+    def test_sku_non_ascii_digits(self):
+        """Test SKUs written in Arabic-Indic digits are matched in auto mode."""
+        df = pd.DataFrame({
+            'product name': ['Item A', 'Item B'],
+            'sku': ['ITEM-\u0665', 'ITEM-\u0661\u0662']
+        })
+
+        matched_df, summary = match(df, mode='auto')
+
+        assert summary['mode_used'] == 'sku'
+        assert list(matched_df['slot']) == [5, 12]
+        assert summary['needs_review'] == 0
+
     def test_sku_duplicates(self):
         """Test SKU matching detects duplicates."""
         df = pd.DataFrame({
@@ -261,6 +566,33 @@ class TestSKUMatching:
         assert all(matched_df['needs_review'])
         assert summary['duplicate_slots'] == 1
 
+    def test_sku_duplicates_count_matched_slots_only(self):
+        """Test missing SKUs and excluded rows are not counted as duplicates."""
+        df = pd.DataFrame({
+            'product name': ['Item A', 'Item B', 'Givy', 'Item C', 'Item D', 'Item E', 'Item F'],
+            'sku': ['ITEM-5', 'ITEM-5', 'ITEM-7', 'ITEM-7', 'ITEM-8', 'ITEM-8', None]
+        })
+
+        matched_df, summary = match(df, mode='sku', exclude_keywords=['givy'])
+
+        assert summary['duplicate_slots'] == 2
+        assert matched_df['review_reason'].tolist() == [
+            'duplicate_slot', 'duplicate_slot', '', '',
+            'duplicate_slot', 'duplicate_slot', 'sku_missing_or_invalid'
+        ]
+
+    def test_sku_duplicates_large_slot_numbers(self):
+        """Test duplicates are found when slot numbers are too big to count densely."""
+        df = pd.DataFrame({
+            'product name': ['Item A', 'Item B', 'Item C'],
+            'sku': ['ITEM-5000000000', 'ITEM-5000000000', 'ITEM-1']
+        })
+
+        matched_df, summary = match(df, mode='sku')
+
+        assert matched_df['needs_review'].tolist() == [True, True, False]
+        assert summary['duplicate_slots'] == 1
+
 
 class TestAutoMode:
     """Test automatic mode selection."""
@@ -287,6 +619,61 @@ class TestAutoMode:
 
         assert summary['mode_used'] == 'sequence'
 
+    def test_match_leaves_input_untouched(self):
+        """Test matching does not modify the caller's DataFrame."""
+        df = pd.DataFrame({
+            'product name': ['Item C', 'Item A'],
+            'sku': ['ITEM-5', 'ITEM-5'],
+            'placed at': ['2024-01-03 10:00', '2024-01-01 10:00']
+        })
+        original = df.copy()
+
+        match(df, mode='sku')
+        match(df, mode='sequence')
+
+        pd.testing.assert_frame_equal(df, original)
+
+
+class TestExport:
+    """Test output formats."""
+
+    def test_export_formats_round_trip(self):
+        """Test CSV, Parquet and Feather exports contain the same data."""
+        df = pd.DataFrame({
+            'product name': ['Item C', 'Item A', 'Givy Item'],
+            'placed at': ['2024-01-03 10:00', '2024-01-01 10:00', '2024-01-02 10:00']
+        })
+
+        matched_df, summary = match(
+            df,
+            mode='sequence',
+            exclude_keywords=['givy']
+        )
+
+        from_csv = pd.read_csv(BytesIO(export_csv(matched_df)))
+        from_parquet = pd.read_parquet(BytesIO(export_parquet(matched_df)))
+        from_feather = pd.read_feather(BytesIO(export_feather(matched_df)))
+
+        for exported in [from_csv, from_parquet, from_feather]:
+            assert list(exported.columns) == list(matched_df.columns)
+            assert exported['product name'].tolist() == ['Item A', 'Givy Item', 'Item C']
+            assert exported['slot'].tolist()[0] == 1
+            assert pd.isna(exported['slot'].tolist()[1])
+            assert exported['slot'].tolist()[2] == 2
+
+    def test_iter_csv_matches_export_csv(self):
+        """Test streamed CSV batches join up to the one-shot export."""
+        df = pd.DataFrame({
+            'product name': ['Item A', 'Item B', 'Item C', 'Item D', 'Item E'],
+            'sku': ['ITEM-1', 'ITEM-2', '', 'ITEM-4', 'ITEM-4']
+        })
+
+        matched_df, summary = match(df, mode='sku')
+        chunks = list(iter_csv(matched_df, chunk_size=2))
+
+        assert len(chunks) == 4  # header + 3 batches
+        assert b''.join(chunks) == export_csv(matched_df)
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])